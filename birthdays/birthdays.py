@@ -32,6 +32,8 @@ class Birthdays(Cog):
     # Behavior related constants
     DATE_GROUP = "DATE"
     GUILD_DATE_GROUP = "GUILD_DATE"
+    # force_registration is for weaklings
+    UNIQUE_ID = int(hashlib.sha512((__author__ + "@Birthdays").encode()).hexdigest(), 16)
 
     # Embed constants
     BDAY_LIST_TITLE = _("Birthday List")
@@ -50,25 +52,30 @@ class Birthdays(Cog):
         super().__init__()
         self.bot = bot
         self.logger = logging.getLogger("red.ZeCogsV3.birthdays")
-        # force_registration is for weaklings
-        unique_id = int(hashlib.sha512((self.__author__ + "@" + self.__class__.__name__).encode()).hexdigest(), 16)
-        self.config = Config.get_conf(self, identifier=unique_id)
+        self.config = Config.get_conf(self, identifier=self.UNIQUE_ID)
         self.config.init_custom(self.DATE_GROUP, 1)
         self.config.init_custom(self.GUILD_DATE_GROUP, 2)
         self.config.register_guild(channel=None, role=None, yesterdays=[])
+        self.guild_cache = {}  # {guild_id: {"channel": channel_id, "role": role_id}}
+        self.guild_cache_lock = asyncio.Lock()
         self.bday_loop = asyncio.ensure_future(self.initialise())  # Starts a loop which checks daily for birthdays
         asyncio.ensure_future(self.check_breaking_change())
 
     # Events
     async def initialise(self):
         await self.bot.wait_until_ready()
+        await self.load_guild_cache()
         with contextlib.suppress(RuntimeError):
             while self == self.bot.get_cog(self.__class__.__name__):  # Stops the loop when the cog is reloaded
                 now = datetime.datetime.utcnow()
-                tomorrow = (now + datetime.timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
-                await asyncio.sleep((tomorrow - now).total_seconds())
+                today_at_midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+                # Wake up a minute past midnight so utcnow()'s microseconds can't land us on the same UTC day again
+                next_midnight = today_at_midnight + datetime.timedelta(days=1, minutes=1)
+                await asyncio.sleep((next_midnight - now).total_seconds())
                 try:
-                    await self.clean_yesterday_bdays()
+                    # One Config read per tick; refreshes the guild cache and feeds the cleanup
+                    all_guild_configs = await self.load_guild_cache()
+                    await self.clean_yesterday_bdays(all_guild_configs)
                 except Exception as e:
                     self.logger.error("An error occured during cleaning up of previous birthdays.", exc_info=e)
                 try:
@@ -93,6 +100,7 @@ class Birthdays(Cog):
         message = ctx.message
         guild = message.guild
         await self.config.guild(channel.guild).channel.set(channel.id)
+        await self.update_guild_cache(channel.guild.id, channel=channel.id)
         await message.channel.send(self.CHANNEL_SET(g=guild.name, c=channel.name))
 
     @bday.command(name="role")
@@ -102,6 +110,7 @@ class Birthdays(Cog):
         message = ctx.message
         guild = message.guild
         await self.config.guild(role.guild).role.set(role.id)
+        await self.update_guild_cache(role.guild.id, role=role.id)
         await message.channel.send(self.ROLE_SET(g=guild.name, r=role.name))
 
     @bday.command(name="remove", aliases=["del", "clear", "rm"])
@@ -140,18 +149,19 @@ class Birthdays(Cog):
         await self.clean_bdays()
         bdays = await self.get_guild_date_configs(message.guild.id)
         this_year = datetime.date.today().year
+        # Parse each ordinal once up front instead of re-fetching the config entry in nested generators
+        parsed_bdays = {datetime.datetime.fromordinal(int(ordinal)): users
+                        for ordinal, users in bdays.items() if len(users) > 0}
         msg = f"{bold(self.BDAY_LIST_TITLE())}\n"
-        for k, g in itertools.groupby(sorted(datetime.datetime.fromordinal(int(o)) for o in bdays.keys()),
-                                      lambda i: i.month):
+        for k, g in itertools.groupby(sorted(parsed_bdays.keys()), lambda i: i.month):
             # Basically separates days with "\n" and people on the same day with ", "
             value = "\n".join(date.strftime("%d").lstrip("0") + ": "
                               + ", ".join("<@!{}>".format(u_id)
                                           + ("" if year is None else " ({})".format(this_year - int(year)))
-                                          for u_id, year in bdays.get(str(date.toordinal()), {}).items())
-                              for date in g if len(bdays.get(str(date.toordinal()))) > 0)
-            if not value.isspace():  # Only contains whitespace when there's no birthdays in that month
-                msg += f"{bold(datetime.datetime(year=1, month=k, day=1).strftime('%B'))}\n"
-                msg += f"{value}\n\n"
+                                          for u_id, year in parsed_bdays[date].items())
+                              for date in g)
+            msg += f"{bold(datetime.datetime(year=1, month=k, day=1).strftime('%B'))}\n"
+            msg += f"{value}\n\n"
 
         pages = list(pagify(msg, delims=["\n\n"], page_length=2000))
         for i, em in enumerate(pages):
@@ -160,21 +170,12 @@ class Birthdays(Cog):
             await ctx.send(embed=embed)
 
     # Utilities
-    async def clean_bday(self, guild_id: int, guild_config: dict, user_id: int):
-        guild = self.bot.get_guild(guild_id)
-        if guild is not None:
-            role = discord.utils.get(guild.roles, id=guild_config.get("role"))
-            # If discord.Server.roles was an OrderedDict instead...
-            await self.maybe_update_guild(guild)
-            member = guild.get_member(user_id)
-            if member is not None and role is not None and role in member.roles:
-                # If the user and the role are still on the server and the user has the bday role
-                await member.remove_roles(role)
-
-    async def handle_bday(self, guild_id: int, user_id: int, year: str):
+    async def handle_bday(self, guild_id: int, user_id: int, year: str, this_year: int):
+        # Returns (guild_id, member_id) when the role was given so the caller can batch the yesterdays writes
+        result = None
         embed = discord.Embed(color=discord.Colour.gold())
         if year is not None:
-            age = datetime.date.today().year - int(year)  # Doesn't support non-eastern age counts but whatever
+            age = this_year - int(year)  # Doesn't support non-eastern age counts but whatever
             embed.description = self.BDAY_WITH_YEAR(user_id, age)
         else:
             embed.description = self.BDAY_WITHOUT_YEAR(user_id)
@@ -182,44 +183,61 @@ class Birthdays(Cog):
         if guild is not None:  # Ignore unavailable servers or servers the bot isn't in anymore
             member = guild.get_member(user_id)
             if member is not None:
-                role_id = await self.config.guild(guild).role()
+                guild_config = self.guild_cache.get(guild.id, {})
+                role_id = guild_config.get("role")
                 if role_id is not None:
-                    role = discord.utils.get(guild.roles, id=role_id)
+                    role = guild.get_role(role_id)
                     if role is not None:
                         try:
-                            await member.add_roles(role)
+                            await member.edit(roles=list(member.roles) + [role])
                         except (discord.Forbidden, discord.HTTPException):
                             pass
                         else:
-                            async with self.config.guild(guild).yesterdays() as yesterdays:
-                                yesterdays.append(member.id)
+                            result = (guild.id, member.id)
                     else:
                         self.logger.warning("Could not find the role with id {} in {}".format(role_id, guild))
-                channel_id = await self.config.guild(guild).channel()
+                channel_id = guild_config.get("channel")
                 channel = guild.get_channel(channel_id)
                 if channel is not None:
-                    await channel.send(embed=embed)
+                    try:
+                        await channel.send(embed=embed)
+                    except discord.HTTPException:
+                        # The role is already given; still return the result so it gets removed tomorrow
+                        self.logger.warning("Couldn't send the birthday announcement in channel {} of guild {}"
+                                            .format(channel_id, guild))
                 else:
                     self.logger.warning("Couldn't find the birthdays channel in guild {} with id {}".format(guild, channel_id))
             else:
                 self.logger.warning("Could not find the member with id {} in {}".format(user_id, guild))
         else:
             self.logger.warning("Could not find the guild with id {}".format(guild_id))
+        return result
 
     async def clean_bdays(self):
         # Cleans the birthday entries with no user's birthday
         # Also removes birthdays of users who aren't in any visible server anymore
         # Happens when someone changes their birthday and there's nobody else in the same day
         birthdays = await self.get_all_date_configs()
+        # Union of all member ids the bot can see; checking it is O(1) instead of O(guilds) per user
+        visible_members = set()
+        for g in self.bot.guilds:
+            visible_members.update(m.id for m in g.members)
+        # Scan the snapshot first, then mutate, so Config isn't re-read for every date
+        pending_deletes = []
+        empty_dates = []
         for guild_id, guild_bdays in birthdays.items():
             for date, bdays in guild_bdays.items():
+                remaining = len(bdays)
                 for user_id, year in bdays.items():
-                    if not any(g.get_member(int(user_id)) is not None for g in self.bot.guilds):
-                        async with self.get_date_config(guild_id, date)() as config_bdays:
-                            del config_bdays[user_id]
-                config_bdays = await self.get_date_config(guild_id, date)()
-                if len(config_bdays) == 0:
-                    await self.get_date_config(guild_id, date).clear()
+                    if int(user_id) not in visible_members:
+                        pending_deletes.append((guild_id, date, user_id))
+                        remaining -= 1
+                if remaining == 0:
+                    empty_dates.append((guild_id, date))
+        for guild_id, date, user_id in pending_deletes:
+            await self.get_date_config(guild_id, date).get_attr(user_id).clear()
+        for guild_id, date in empty_dates:
+            await self.get_date_config(guild_id, date).clear()
 
     async def remove_user_bday(self, guild_id: int, user_id: int):
         user_id = str(user_id)
@@ -229,20 +247,49 @@ class Birthdays(Cog):
                 await self.get_date_config(guild_id, date).get_attr(user_id).clear()
         # Won't prevent the cleaning problem here cause the users can leave so we'd still want to clean anyway
 
-    async def clean_yesterday_bdays(self):
-        all_guild_configs = await self.config.all_guilds()
+    async def clean_yesterday_bdays(self, all_guild_configs: dict):
+        # Resolve each guild and its role once and queue the role removals for everyone in yesterdays
+        tasks = []
         for guild_id, guild_config in all_guild_configs.items():
-            for user_id in guild_config.get("yesterdays", []):
-                asyncio.ensure_future(self.clean_bday(guild_id, guild_config, user_id))
+            yesterdays = guild_config.get("yesterdays", [])
+            if len(yesterdays) > 0:
+                guild = self.bot.get_guild(guild_id)
+                if guild is not None:
+                    role = guild.get_role(guild_config.get("role"))
+                    if role is not None:
+                        await self.maybe_update_guild(guild)
+                        for user_id in yesterdays:
+                            member = guild.get_member(user_id)
+                            if member is not None and role in member.roles:
+                                # If the user and the role are still on the server and the user has the bday role
+                                tasks.append(member.edit(roles=list(set(member.roles) - {role})))
             await self.config.guild_from_id(guild_id).yesterdays.clear()
+        # Let discord.py's ratelimiter interleave the REST calls instead of serializing them
+        for result in await asyncio.gather(*tasks, return_exceptions=True):
+            if isinstance(result, Exception):
+                self.logger.warning("Failed to remove a birthday role", exc_info=result)
 
     async def do_today_bdays(self):
         bday_configs = await self.get_all_date_configs()
+        today = datetime.datetime.utcnow().date()
+        this_ordinal = str(today.replace(year=1).toordinal())
+        tasks = []
         for guild_id, bdays_config in bday_configs.items():
-            this_date = datetime.datetime.utcnow().date().replace(year=1)
-            todays_bday_config = bdays_config.get(str(this_date.toordinal()), {})
+            guild_id = int(guild_id)
+            todays_bday_config = bdays_config.get(this_ordinal, {})
             for user_id, year in todays_bday_config.items():
-                asyncio.ensure_future(self.handle_bday(int(guild_id), int(user_id), year))
+                tasks.append(self.handle_bday(guild_id, int(user_id), year, today.year))
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        # One yesterdays write per guild instead of one read-modify-write per birthday user
+        given_roles = {}
+        for result in results:
+            if isinstance(result, Exception):
+                self.logger.warning("Failed to handle a birthday", exc_info=result)
+            elif isinstance(result, tuple):
+                given_roles.setdefault(result[0], []).append(result[1])
+        for guild_id, member_ids in given_roles.items():
+            async with self.config.guild_from_id(guild_id).yesterdays() as yesterdays:
+                yesterdays.extend(member_ids)
 
     # Provided by <@78631113035100160>
     async def maybe_update_guild(self, guild: discord.Guild):
@@ -252,10 +299,12 @@ class Birthdays(Cog):
                 await self.bot.request_offline_members(guild)
 
     def parse_date(self, date_str: str):
+        # datetime.date's own range checks validate the input; strptime is overkill for a fixed MM-DD shape
         result = None
         try:
-            result = datetime.datetime.strptime(date_str, "%m-%d").date().replace(year=1)
-        except ValueError:
+            month, day = date_str.split("-")
+            result = datetime.date(year=1, month=int(month), day=int(day))
+        except (ValueError, TypeError):
             pass
         return result
 
@@ -282,6 +331,19 @@ Note: This warning should appear only once.
     - Birthdays' developer""")
 
     # Utilities - Config
+    async def load_guild_cache(self) -> dict:
+        # Caches the guilds' channel and role to avoid hitting Config on every loop iteration
+        # Returns the all_guilds snapshot so callers can reuse it instead of re-reading Config
+        all_guild_configs = await self.config.all_guilds()
+        async with self.guild_cache_lock:
+            self.guild_cache = {guild_id: {"channel": guild_config.get("channel"), "role": guild_config.get("role")}
+                                for guild_id, guild_config in all_guild_configs.items()}
+        return all_guild_configs
+
+    async def update_guild_cache(self, guild_id: int, **values):
+        async with self.guild_cache_lock:
+            self.guild_cache.setdefault(guild_id, {"channel": None, "role": None}).update(values)
+
     def get_date_config(self, guild_id: int, date: int) -> Group:
         return self.config.custom(self.GUILD_DATE_GROUP, str(guild_id), str(date))
 
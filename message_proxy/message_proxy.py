@@ -1,3 +1,4 @@
+import asyncio
 import io
 import logging
 
@@ -25,6 +26,9 @@ class MessageProxy(Cog):
     """Send and edit messages through the bot"""
     __author__ = "ZeLarpMaster#0818"
 
+    # Behavior related constants
+    MAX_ATTACHMENT_SIZE = 25 * 1024 * 1024  # Discord's upload limit
+
     # Log constants
     CANT_DELETE_MESSAGE = _("Failed to delete a message in {c_name}")
 
@@ -33,11 +37,17 @@ class MessageProxy(Cog):
     FAILED_TO_FIND_MESSAGE = _(":x: Failed to find the message with id {m_id} in {c_mention}.")
     COMMAND_FORMAT = _("{p}msg edit <#{c_id}> {m_id} ```\n{content}```")
     PLACEHOLDER = _("Placeholder")
+    ATTACHMENT_TOO_BIG = _(":x: The attachment is too big. Maximum size: {size} MB.")
 
     def __init__(self, bot: Red):
         super().__init__()
         self.bot = bot
         self.logger = logging.getLogger("red.ZeCogsV3.message_proxy")
+        # One session for the cog's lifetime; a new one per download would redo DNS + TLS every time
+        self.session = aiohttp.ClientSession(headers={"User-Agent": "Mozilla"})
+
+    def cog_unload(self):
+        asyncio.ensure_future(self.session.close())
 
     @commands.group(name="message", aliases=["msg"])
     @commands.guild_only()
@@ -54,13 +64,19 @@ class MessageProxy(Cog):
         An attachment can be provided.
         If no content is provided, at least an attachment must be provided."""
         message = ctx.message
+        img = None
         if message.attachments:
+            if message.attachments[0].size > self.MAX_ATTACHMENT_SIZE:
+                await ctx.send(self.ATTACHMENT_TOO_BIG(size=self.MAX_ATTACHMENT_SIZE // (1024 * 1024)))
+                return
             img = await self.get_attachment_image(message)
-            msg = await channel.send(content and self.PLACEHOLDER(), file=img)
-        else:
+        if content is None and img is None:
             msg = await channel.send(self.PLACEHOLDER())
+        else:
+            # Content and file go out in a single request; the placeholder-then-edit dance pinged
+            # nobody because edits don't notify, so keep mentions silent here too
+            msg = await channel.send(content, file=img, allowed_mentions=discord.AllowedMentions.none())
         if content is not None:
-            await msg.edit(content=content)
             reply = self.COMMAND_FORMAT(p=ctx.prefix, content=content, m_id=msg.id, c_id=channel.id)
             try:
                 await ctx.message.delete()
@@ -92,7 +108,10 @@ class MessageProxy(Cog):
     # Utilities
     async def get_attachment_image(self, message: discord.Message) -> discord.File:
         attachment = message.attachments[0]
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url=attachment.url, headers={"User-Agent": "Mozilla"}) as response:
-                img = io.BytesIO(await response.read())
-                return discord.File(img, filename=attachment.filename)
+        async with self.session.get(url=attachment.url) as response:
+            # Stream into a single buffer; response.read() would hold a second full copy of the attachment
+            img = io.BytesIO()
+            async for chunk in response.content.iter_chunked(64 * 1024):
+                img.write(chunk)
+            img.seek(0)
+            return discord.File(img, filename=attachment.filename)
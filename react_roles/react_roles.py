@@ -2,12 +2,11 @@ import asyncio
 import discord
 import itertools
 import logging
-import math
 import re
-import traceback
 import typing
 import hashlib
 import collections
+import random
 import time
 
 from discord.raw_models import RawReactionActionEvent, RawMessageDeleteEvent, RawBulkMessageDeleteEvent
@@ -28,6 +27,31 @@ def _(s):
     return func
 
 
+# Shared read-only defaults so cache misses on the event path don't allocate a fresh container
+EMPTY_DICT = {}
+EMPTY_SET = frozenset()
+
+
+class TokenBucket:
+    """Paces work at `rate` per second while letting short bursts spend up to `capacity` tokens"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.last_refill = time.monotonic()
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+            self.last_refill = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
 @cog_i18n(T_)
 class ReactRoles(Cog):
     """Associate emojis on messages with roles to gain/lose roles when clicking on reactions
@@ -37,8 +61,11 @@ class ReactRoles(Cog):
 
     # Behavior related constants
     MAXIMUM_PROCESSED_PER_SECOND = 5
-    PROCESSING_WAIT_TIME = 0 if MAXIMUM_PROCESSED_PER_SECOND == 0 else 1 / MAXIMUM_PROCESSED_PER_SECOND
-    EMOTE_REGEX = re.compile("<a?:[a-zA-Z0-9_]{2,32}:(\d{1,20})>")
+    COALESCE_WINDOW = 0.1  # Seconds to wait for more reactions to merge into the same member edits
+    ERROR_LOG_COOLDOWN = 60  # Seconds between reports of the same error on the same message
+    RETRY_BASE_DELAY = 0.5  # Seconds before the first retry of a failed member edit
+    RETRY_MAX_DELAY = 60  # Ceiling on the exponential retry backoff
+    EMOTE_REGEX = re.compile(r"<a?:[a-zA-Z0-9_]{2,32}:([0-9]{1,20})>", re.ASCII)
     MESSAGE_GROUP = "MESSAGE"
 
     # Embed constants
@@ -84,6 +111,9 @@ class ReactRoles(Cog):
     CANT_CHECK_LINKED = _(":x: Cannot run a check on linked messages.")
     REACTION_NOT_FOUND = _(":x: Could not find the reaction of that message.")
     CANT_GIVE_ROLE = _(":x: I can't give that role! Maybe it's higher than my own highest role?")
+    BULK_MUST_SPECIFY = _(":x: You must specify at least one `emoji;role` pair.")
+    BULK_PAIR_INVALID = _(":x: The following `emoji;role` pairs were invalid: {}")
+    BULK_SUCCESSFUL = _(":white_check_mark: Bound {c} role(s) on the message in {channel}.")
 
     def __init__(self, bot: Red):
         super().__init__()
@@ -97,60 +127,78 @@ class ReactRoles(Cog):
             self.config.init_custom(self.MESSAGE_GROUP, 1)
         self.config.register_guild(links={})
         self.role_queue = asyncio.Queue()
+        self.role_sem = asyncio.Semaphore(self.MAXIMUM_PROCESSED_PER_SECOND)
+        self.edit_bucket = TokenBucket(self.MAXIMUM_PROCESSED_PER_SECOND, self.MAXIMUM_PROCESSED_PER_SECOND * 2)
+        self.bot_user_id = None  # Filled in once the bot is ready
         self.role_map = {}
-        self.role_cache = {}
-        self.links = {}  # {server.id: {channel.id_message.id: [role]}}
+        self.role_cache = {}  # {(guild.id, channel.id, message.id, emoji_str): role}
+        self.message_binds = {}  # {(guild.id, channel.id, message.id): {emoji_str: role}}
+        self.bound_messages = {}  # {guild.id: set of bound message ids}; fast filter for raw events
+        self.error_log_times = {}  # {(error type, message.id): last time it was logged}
+        self.known_message_configs = set()  # (channel.id, message.id) pairs present in the MESSAGE_GROUP config
+        self.message_fetches = {}  # {(channel.id, message.id): future of the in-flight fetch}
+        self.links = {}  # {server.id: {(channel.id, message.id): set(role)}}
+        self.link_configs = {}  # Write-through copy of each guild's links config: {server.id: {name: [pairs]}}
+        self.link_names = {}  # Reverse index of link_configs: {server.id: {pair string: set of link names}}
         asyncio.ensure_future(self._init_bot_manipulation())
         asyncio.ensure_future(self.process_role_queue())
 
     # Events
     @Cog.listener()
     async def on_raw_reaction_add(self, payload: RawReactionActionEvent):
-        # noinspection PyBroadException
+        # Two set probes reject DMs, unconfigured guilds and untracked messages before anything else;
+        # almost every reaction the bot sees bails out right here
+        guild_messages = self.bound_messages.get(payload.guild_id)
+        if guild_messages is None or payload.message_id not in guild_messages:
+            return
         try:
             await self.check_add_role(payload)
-        except:  # To prevent the listener from exploding if an exception happens
-            traceback.print_exc()
+        except Exception as e:  # To prevent the listener from exploding if an exception happens
+            self.log_reaction_error(e, payload)
 
     @Cog.listener()
     async def on_raw_reaction_remove(self, payload: RawReactionActionEvent):
-        # noinspection PyBroadException
+        guild_messages = self.bound_messages.get(payload.guild_id)
+        if guild_messages is None or payload.message_id not in guild_messages:
+            return
         try:
             await self.check_remove_role(payload)
-        except:  # To prevent the listener from exploding if an exception happens
-            traceback.print_exc()
+        except Exception as e:  # To prevent the listener from exploding if an exception happens
+            self.log_reaction_error(e, payload)
 
     @Cog.listener()
     async def on_raw_message_delete(self, payload: RawMessageDeleteEvent):
-        await self.check_delete_message(payload)
+        await self.check_delete_messages(payload.guild_id, payload.channel_id, (payload.message_id, ))
 
     @Cog.listener()
     async def on_raw_bulk_message_delete(self, payload: RawBulkMessageDeleteEvent):
-        new_payload = {"channel_id": payload.channel_id, "guild_id": payload.guild_id}
-        for message_id in payload.message_ids:
-            new_payload["id"] = message_id
-            await self.check_delete_message(RawMessageDeleteEvent(new_payload))
+        await self.check_delete_messages(payload.guild_id, payload.channel_id, payload.message_ids)
 
     async def _init_bot_manipulation(self):
         await self.bot.wait_until_ready()
+        self.bot_user_id = self.bot.user.id  # Saves the bot.user property chase on every reaction
 
         counter = collections.Counter()
 
-        # Caching roles
+        # Caching roles; built purely from Config and the guild caches, no message fetches.
+        # A message deleted while the bot was offline gets cleaned up by the raw-delete
+        # handler the next time anything happens to it, so validating it up front only
+        # cost one HTTP round-trip per binding for no information
+        role_indexes = {}  # {guild.id: {role.id: role}} to avoid scanning guild.roles per entry
         channel_configs = await self.get_all_message_configs()
         for channel_id, channel_conf in channel_configs.items():
             channel = self.bot.get_channel(int(channel_id))
+            self.known_message_configs.update((int(channel_id), int(msg_id)) for msg_id in channel_conf)
             if channel is not None:
+                guild_roles = role_indexes.get(channel.guild.id)
+                if guild_roles is None:
+                    guild_roles = role_indexes[channel.guild.id] = {role.id: role for role in channel.guild.roles}
                 for msg_id, msg_conf in channel_conf.items():
-                    msg = await self.safe_get_message(channel, msg_id)
-                    if msg is not None:
-                        for emoji_str, role_id in msg_conf.items():
-                            role = discord.utils.get(channel.guild.roles, id=role_id)
-                            if role is not None:
-                                self.add_to_cache(channel.guild.id, channel.id, msg.id, emoji_str, role)
-                                counter.update((channel.name, ))
-                    else:
-                        self.logger.warning(self.LOG_MESSAGE_NOT_FOUND(msg_id=msg_id, channel=channel.mention))
+                    for emoji_str, role_id in msg_conf.items():
+                        role = guild_roles.get(role_id)
+                        if role is not None:
+                            self.add_to_cache(channel.guild.id, channel.id, int(msg_id), emoji_str, role)
+                            counter.update((channel.name, ))
             else:
                 self.logger.warning(self.LOG_CHANNEL_NOT_FOUND(channel_id=channel_id))
 
@@ -161,6 +209,11 @@ class ReactRoles(Cog):
             if guild is not None:
                 link_list = guild_conf.get("links")
                 if link_list is not None:
+                    self.link_configs[guild_id] = link_list
+                    name_index = self.link_names.setdefault(guild_id, {})
+                    for link_name, link_pairs in link_list.items():
+                        for pair in link_pairs:
+                            name_index.setdefault(pair, set()).add(link_name)
                     self.parse_links(guild_id, link_list.values())
             else:
                 self.logger.warning(self.LOG_SERVER_NOT_FOUND(guild_id=guild_id))
@@ -181,7 +234,7 @@ class ReactRoles(Cog):
     async def _roles_link_list(self, ctx: Context):
         """Lists all reaction links in the current server"""
         guild = ctx.guild
-        server_links = await self.config.guild(guild).links()
+        server_links = self.link_configs.get(guild.id, {})
         embed = discord.Embed(title=self.LINK_LIST_TITLE(), colour=discord.Colour.light_grey())
         for name, pairs in server_links.items():
             value = ""
@@ -199,7 +252,7 @@ class ReactRoles(Cog):
     async def _roles_unlink(self, ctx: Context, name: str):
         """Remove a link of messages by its name"""
         guild = ctx.message.guild
-        server_links = await self.config.guild(guild).links()
+        server_links = self.link_configs.get(guild.id, {})
         name = name.lower()
         if name not in server_links:
             response = self.UNLINK_NOT_FOUND()
@@ -255,14 +308,18 @@ class ReactRoles(Cog):
             response = self.LINK_FAILED(reasons="\n".join(failure_reasons))
         else:
             # Save configs
-            async with self.config.guild(guild).links() as server_links:
-                name = name.lower()
-                if name in server_links:
-                    response = self.LINK_NAME_TAKEN()
-                else:
-                    server_links[name] = pairs
-                    self.parse_links(guild.id, [pairs])
-                    response = self.LINK_SUCCESSFUL()
+            server_links = self.link_configs.setdefault(guild.id, {})
+            name = name.lower()
+            if name in server_links:
+                response = self.LINK_NAME_TAKEN()
+            else:
+                server_links[name] = pairs
+                name_index = self.link_names.setdefault(guild.id, {})
+                for pair in pairs:
+                    name_index.setdefault(pair, set()).add(name)
+                await self.config.guild(guild).links.set(server_links)
+                self.parse_links(guild.id, [pairs])
+                response = self.LINK_SUCCESSFUL()
         await ctx.send(response)
 
     @_roles.command(name="add")
@@ -292,33 +349,98 @@ class ReactRoles(Cog):
             response = self.CANT_MANAGE_ROLES()
         elif channel.permissions_for(channel.guild.me).add_reactions is False:
             response = self.CANT_ADD_REACTIONS()
+        elif channel.guild.me.top_role <= role or role.managed:
+            # The hierarchy check Discord would apply, done locally instead of probing with a
+            # real give-and-take of the role (two REST calls and two audit log entries)
+            response = self.CANT_GIVE_ROLE()
         else:
             msg_conf = self.get_message_config(channel.id, message.id)
-            emoji_match = self.EMOTE_REGEX.fullmatch(emoji)
-            emoji_id = emoji if emoji_match is None else emoji_match.group(1)
+            emoji_id = emoji
+            if emoji.startswith("<") and emoji.endswith(">"):
+                # Slice the id out of <:name:id> directly; the regex only arbitrates malformed input
+                candidate = emoji.rsplit(":", 1)[-1][:-1]
+                if candidate.isdigit():
+                    emoji_id = candidate
+                else:
+                    emoji_match = self.EMOTE_REGEX.fullmatch(emoji)
+                    if emoji_match is not None:
+                        emoji_id = emoji_match.group(1)
             if emoji_id in await msg_conf({}):
                 response = self.ALREADY_BOUND()
             else:
                 emoji = None
                 if emoji_id.isdigit():
-                    for emoji_server in self.bot.guilds:
-                        if emoji is None:
-                            emoji = discord.utils.get(emoji_server.emojis, id=int(emoji_id))
+                    emoji = self.bot.get_emoji(int(emoji_id))
                 try:
                     await message.add_reaction(emoji or emoji_id)
                 except discord.HTTPException:  # Failed to find the emoji
                     response = self.EMOJI_NOT_FOUND()
                 else:
-                    try:
-                        await ctx.message.author.add_roles(role)
-                        await ctx.message.author.remove_roles(role)
-                    except (discord.Forbidden, discord.HTTPException):
-                        response = self.CANT_GIVE_ROLE()
-                        await message.remove_reaction(emoji or emoji_id, self.bot.user)
-                    else:
+                    self.add_to_cache(guild.id, channel.id, message_id, emoji_id, role)
+                    await msg_conf.get_attr(emoji_id).set(role.id)
+                    self.known_message_configs.add((channel.id, message_id))
+                    response = self.ROLE_SUCCESSFULLY_BOUND(emoji or emoji_id, channel.mention)
+        await ctx.send(response)
+
+    @_roles.command(name="addbulk")
+    @commands.guild_only()
+    @checks.mod_or_permissions(manage_roles=True)
+    @checks.bot_has_permissions(manage_roles=True, add_reactions=True, manage_messages=True)
+    async def _roles_add_bulk(self, ctx: Context, message_id: int, channel: discord.TextChannel, *entries):
+        """Add several roles on a message with a single config write
+
+        Requires the bot to have permissions: Manage Roles, Add Reactions and Manage Messages
+
+        Each entry must be `emoji;role` where role is a role id, mention or name without spaces
+        `message_id` must be found in `channel`
+        Setting up a whole menu this way writes the message's config once instead of once per emoji"""
+        guild = channel.guild
+        message = await self.safe_get_message(channel, message_id)
+        if message is None:
+            response = self.MESSAGE_NOT_FOUND()
+        elif len(entries) == 0:
+            response = self.BULK_MUST_SPECIFY()
+        elif channel.guild.me.guild_permissions.manage_roles is False:
+            response = self.CANT_MANAGE_ROLES()
+        elif channel.permissions_for(channel.guild.me).add_reactions is False:
+            response = self.CANT_ADD_REACTIONS()
+        else:
+            msg_conf = self.get_message_config(channel.id, message.id)
+            bound = await msg_conf({})
+            new_binds = {}
+            reactions = []
+            invalid_entries = []
+            for entry in entries:
+                emoji, _sep, role_str = entry.partition(";")
+                emoji_match = self.EMOTE_REGEX.fullmatch(emoji)
+                emoji_id = emoji if emoji_match is None else emoji_match.group(1)
+                try:
+                    role = await commands.RoleConverter().convert(ctx, role_str)
+                except commands.BadArgument:
+                    role = None
+                if role is None or role.guild != guild or guild.me.top_role <= role or role.managed \
+                        or emoji_id in bound or emoji_id in new_binds:
+                    # Same hierarchy check as the single add; an unassignable role would only
+                    # fail with Forbidden on every reaction once bound
+                    invalid_entries.append(entry)
+                else:
+                    new_binds[emoji_id] = role
+                    emoji_obj = self.bot.get_emoji(int(emoji_id)) if emoji_id.isdigit() else None
+                    reactions.append(emoji_obj or emoji_id)
+            if len(invalid_entries) > 0:
+                response = self.BULK_PAIR_INVALID(", ".join(invalid_entries))
+            else:
+                try:
+                    await asyncio.gather(*(message.add_reaction(reaction) for reaction in reactions))
+                except discord.HTTPException:  # Failed to find one of the emojis
+                    response = self.EMOJI_NOT_FOUND()
+                else:
+                    for emoji_id, role in new_binds.items():
                         self.add_to_cache(guild.id, channel.id, message_id, emoji_id, role)
-                        await msg_conf.get_attr(emoji_id).set(role.id)
-                        response = self.ROLE_SUCCESSFULLY_BOUND(emoji or emoji_id, channel.mention)
+                        bound[emoji_id] = role.id
+                    await msg_conf.set(bound)
+                    self.known_message_configs.add((channel.id, message_id))
+                    response = self.BULK_SUCCESSFUL(c=len(new_binds), channel=channel.mention)
         await ctx.send(response)
 
     @_roles.command(name="remove")
@@ -332,33 +454,38 @@ class ReactRoles(Cog):
             To get a message's id: Settings > Appearance > Developer mode then
             Right click a message > Copy ID"""
         guild = channel.guild
-        msg_config = self.get_message_config(channel.id, message_id)
-        all_emojis = await msg_config.all()
-        emoji_config = discord.utils.find(lambda o: o[1] == role.id, all_emojis.items())
-        if emoji_config is None:
+        # The in-memory binds already hold the emoji -> role mapping; no config round-trip needed
+        msg_binds = self.message_binds.get((guild.id, channel.id, message_id), {})
+        emoji_str = next((e for e, r in msg_binds.items() if r.id == role.id), None)
+        if emoji_str is None:
             await ctx.send(self.ROLE_NOT_BOUND())
         else:
-            emoji_str = emoji_config[0]
-            await msg_config.get_attr(emoji_str).clear()
+            await self.get_message_config(channel.id, message_id).get_attr(emoji_str).clear()
             self.remove_role_from_cache(guild.id, channel.id, message_id, emoji_str)
             msg = await self.safe_get_message(channel, message_id)
             if msg is None:
                 await ctx.send(self.ROLE_UNBOUND(self.MESSAGE_NOT_FOUND()))
             else:
-                reaction = discord.utils.find(
-                    lambda r: r.emoji.id == emoji_str if r.custom_emoji else r.emoji == emoji_str, msg.reactions)
+                reactions = {r.emoji.id if r.custom_emoji else r.emoji: r for r in msg.reactions}
+                reaction = reactions.get(int(emoji_str) if emoji_str.isdigit() else emoji_str)
                 if reaction is None:
                     await ctx.send(self.ROLE_UNBOUND(self.REACTION_NOT_FOUND()))
                 else:
                     answer = await ctx.send(self.ROLE_UNBOUND(self.REACTION_CLEAN_START()))
-                    count = 0
-                    start_time = time.perf_counter()
-                    async for user in reaction.users():
-                        await msg.remove_reaction(reaction.emoji, user)
-                        count += 1
-                        if time.perf_counter() - start_time > 1:
-                            await answer.edit(content=self.ROLE_UNBOUND(self.PROGRESS_REMOVED(count, reaction.count)))
-                            start_time = time.perf_counter()
+                    count = reaction.count
+                    try:
+                        # One request wipes the whole reaction, no matter how many users clicked it
+                        await msg.clear_reaction(reaction.emoji)
+                    except discord.HTTPException:  # Fall back to removing the users one by one
+                        count = 0
+                        start_time = time.perf_counter()
+                        async for user in reaction.users():
+                            await msg.remove_reaction(reaction.emoji, user)
+                            count += 1
+                            if time.perf_counter() - start_time > 1:
+                                await answer.edit(
+                                    content=self.ROLE_UNBOUND(self.PROGRESS_REMOVED(count, reaction.count)))
+                                start_time = time.perf_counter()
                     await answer.edit(content=self.ROLE_UNBOUND(self.REACTION_CLEAN_DONE(count)))
 
     @_roles.command(name="check")
@@ -371,7 +498,7 @@ class ReactRoles(Cog):
         guild = channel.guild
         msg = await self.safe_get_message(channel, message_id)
         server_links = self.links.get(guild.id, {})
-        if str(channel.id) + "_" + str(message_id) in server_links:
+        if (channel.id, message_id) in server_links:
             await ctx.send(self.CANT_CHECK_LINKED())
         elif msg is None:
             await ctx.send(self.MESSAGE_NOT_FOUND())
@@ -381,19 +508,23 @@ class ReactRoles(Cog):
                 progress_msg = await ctx.send(self.INITIALIZING())
                 given_roles = 0
                 checked_count = 0
-                total_count = sum(map(lambda r: r.count, msg.reactions)) - len(msg.reactions)  # Remove the bot's
+                total_count = sum(r.count - 1 for r in msg.reactions)  # Remove the bot's
                 total_reactions = 0
+                start_time = time.perf_counter()  # One throttle window for the whole scan
                 for react in msg.reactions:  # Go through all reactions on the message and add the roles if needed
                     total_reactions += 1
-                    emoji_str = str(react.emoji.id) if react.custom_emoji else react.emoji
-                    role = self.get_from_cache(guild.id, channel.id, message_id, emoji_str)
+                    emoji_key = react.emoji.id if react.custom_emoji else react.emoji
+                    role = self.get_from_cache(guild.id, channel.id, message_id, emoji_key)
                     if role is not None:
-                        start_time = time.perf_counter()
                         async for user in react.users():
                             member = guild.get_member(user.id)
+                            # _roles is discord.py's sorted id list; has() is a binary search with
+                            # no Role objects materialized
+                            # noinspection PyProtectedMember
                             if member is not None and member != self.bot.user and \
-                                    discord.utils.get(member.roles, id=role.id) is None:
-                                await member.add_roles(role)
+                                    not member._roles.has(role.id):
+                                # The queue merges adds from several emojis into one edit per member
+                                await self.add_role_queue(guild.id, member.id, role, True)
                                 given_roles += 1
                             checked_count += 1
                             if time.perf_counter() - start_time > 1:
@@ -402,97 +533,167 @@ class ReactRoles(Cog):
                                 start_time = time.perf_counter()
                     else:
                         checked_count += react.count
-                        await progress_msg.edit(content=self.PROGRESS_FORMAT(c=checked_count, r=total_count,
-                                                                             t=total_reactions))
+                        if time.perf_counter() - start_time > 1:
+                            await progress_msg.edit(content=self.PROGRESS_FORMAT(c=checked_count, r=total_count,
+                                                                                 t=total_reactions))
+                            start_time = time.perf_counter()
                 await progress_msg.edit(content=self.PROGRESS_COMPLETE_FORMAT(c=checked_count, g=given_roles))
 
     # Utilities
+    def log_reaction_error(self, error: Exception, payload: RawReactionActionEvent):
+        # A stale binding can fail on every reaction of a busy menu; don't flood the log with it
+        key = (type(error), payload.message_id)
+        now = time.monotonic()
+        if now - self.error_log_times.get(key, -self.ERROR_LOG_COOLDOWN) >= self.ERROR_LOG_COOLDOWN:
+            self.error_log_times[key] = now
+            self.logger.exception("Failed to handle a reaction on message {}.".format(payload.message_id),
+                                  exc_info=error)
+
     async def check_add_role(self, payload: RawReactionActionEvent):
-        emoji_str = str(payload.emoji.id) if payload.emoji.is_custom_emoji() else payload.emoji.name
-        role = self.get_from_cache(payload.guild_id, payload.channel_id, payload.message_id, emoji_str)
-        if role is not None and payload.user_id != self.bot.user.id:
+        if payload.user_id == self.bot_user_id:
+            return  # The bot seeds every bound emoji itself; skip the cache lookup for its own adds
+        # .id is None exactly when the emoji is unicode; skips the is_custom_emoji() method call
+        emoji_key = payload.emoji.id if payload.emoji.id is not None else payload.emoji.name
+        role = self.get_from_cache(payload.guild_id, payload.channel_id, payload.message_id, emoji_key)
+        if role is not None:
             link = self.get_link(payload.guild_id, payload.channel_id, payload.message_id)
 
             await self.add_role_queue(payload.guild_id, payload.user_id, role, True, linked_roles=link)
 
     async def check_remove_role(self, payload: RawReactionActionEvent):
-        emoji_str = str(payload.emoji.id) if payload.emoji.is_custom_emoji() else payload.emoji.name
-        role = self.get_from_cache(payload.guild_id, payload.channel_id, payload.message_id, emoji_str)
+        # .id is None exactly when the emoji is unicode; skips the is_custom_emoji() method call
+        emoji_key = payload.emoji.id if payload.emoji.id is not None else payload.emoji.name
+        role = self.get_from_cache(payload.guild_id, payload.channel_id, payload.message_id, emoji_key)
         if role is not None:
-            if payload.user_id == self.bot.user.id:
+            if payload.user_id == self.bot_user_id:
                 # Safeguard in case someone removes the bot's reaction by accident
                 # noinspection PyProtectedMember
                 await self.bot.http.add_reaction(payload.message_id, payload.channel_id, payload.emoji._as_reaction())
             else:
                 await self.add_role_queue(payload.guild_id, payload.user_id, role, False)
 
-    async def check_delete_message(self, payload: RawMessageDeleteEvent):
-        # Remove the message's config
-        message_conf = self.get_message_config(payload.channel_id, payload.message_id)
-        if await message_conf(...) is not ...:  # Because for whatever reason this returns {} instead of None
-            await message_conf.clear()
-        # And the cache
-        self.remove_message_from_cache(payload.guild_id, payload.channel_id, payload.message_id)
-        # And the links' cache
-        pair = str(payload.channel_id) + "_" + str(payload.message_id)
-        if pair in self.links.get(payload.guild_id, {}):
-            del self.links[payload.guild_id][pair]
-        # And the links' config
-        async with self.get_guild(payload.guild_id).links({}) as server_links:
-            for links in server_links.values():
-                if pair in links:
-                    links.remove(pair)
+    async def check_delete_messages(self, guild_id: int, channel_id: int, message_ids: typing.Iterable[int]):
+        guild_links = self.links.get(guild_id, EMPTY_DICT)
+        pairs = set()
+        config_clears = []
+        for message_id in message_ids:
+            # Remove the message's config; the in-memory set says whether there's anything to clear
+            if (channel_id, message_id) in self.known_message_configs:
+                config_clears.append(self.get_message_config(channel_id, message_id).clear())
+                self.known_message_configs.discard((channel_id, message_id))
+            # And the cache
+            self.remove_message_from_cache(guild_id, channel_id, message_id)
+            # And the links' cache
+            guild_links.pop((channel_id, message_id), None)
+            pairs.add(str(channel_id) + "_" + str(message_id))
+        if len(config_clears) > 0:
+            # A purge can delete many bound messages at once; overlap their config writes
+            await asyncio.gather(*config_clears)
+        # And the links' config; the cached copy tells us whether a write is needed at all
+        link_configs = self.link_configs.get(guild_id)
+        if link_configs is not None:
+            # The reverse index points straight at the affected links instead of scanning them all
+            name_index = self.link_names.get(guild_id, EMPTY_DICT)
+            changed = False
+            for pair in pairs:
+                for link_name in name_index.pop(pair, ()):
+                    link_configs[link_name].remove(pair)
+                    changed = True
+            if changed:
+                await self.get_guild(guild_id).links.set(link_configs)
 
     async def add_role_queue(self, guild_id: int, user_id: int, role: discord.Role, add_bool: bool, *,
                              linked_roles: set=None):
         linked_roles = linked_roles if linked_roles is not None else set()
-        key = "{}_{}".format(guild_id, user_id)
+        key = (guild_id, user_id)
         q = self.role_map.get(key)
         if q is None:  # True --> add   False --> remove
-            # Always remove the @everyone role to prevent the bot from trying to give it to members
             q = {True: set(), False: set(), "guild_id": guild_id, "user_id": user_id}
-            await self.role_queue.put(key)
+            # The payload travels through the queue itself; role_map only coalesces into pending ops
+            self.role_map[key] = q
+            await self.role_queue.put(q)
         q[True].difference_update(linked_roles)  # Remove the linked roles from the roles to add
         q[False].update(linked_roles)  # Add the linked roles to remove them if the user has any of them
         q[not add_bool] -= {role}
         q[add_bool] |= {role}
-        self.role_map[key] = q
 
     async def process_role_queue(self):  # This exists to update multiple roles at once when possible
         """Loops until the cog is unloaded and processes the role assignments when it can"""
         await self.bot.wait_until_ready()
-        while self == self.bot.get_cog(self.__class__.__name__):  # TODO: Make this work better for multiple guilds
-            key = await self.role_queue.get()
-            q = self.role_map.pop(key)
-            if q is not None:
-                guild_id = q.get("guild_id")
-                user_id = q.get("user_id")
-                if guild_id is not None and user_id is not None:
-                    guild = self.bot.get_guild(guild_id)
-                    await self.maybe_update_guild(guild)
-                    mem = guild.get_member(user_id)
-                    if mem is not None:
-                        all_roles = set(mem.roles)
-                        add_set = q.get(True, set())
-                        del_set = q.get(False, set())
-                        del_set.add(guild.default_role)
-                        try:
-                            # Basically, the user's roles + the added - the removed
-                            await mem.edit(roles=((all_roles | add_set) - del_set))
-                        except (discord.Forbidden, discord.HTTPException):
-                            self.role_map[key] = q  # Try again when it fails
-                            await self.role_queue.put(key)
-                        else:
-                            self.role_queue.task_done()
-                        finally:
-                            await asyncio.sleep(self.PROCESSING_WAIT_TIME)
-                    else:
-                        self.logger.warning(self.LOG_MEMBER_NOT_FOUND(user_id=user_id, guild=guild.name))
+        while self == self.bot.get_cog(self.__class__.__name__):
+            q = await self.role_queue.get()
+            # Give a quick succession of clicks a moment to coalesce into the pending ops
+            await asyncio.sleep(self.COALESCE_WINDOW)
+            # Then drain the whole burst so distinct members are processed concurrently instead of serially
+            batch = [q]
+            while True:
+                try:
+                    batch.append(self.role_queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            await asyncio.gather(*(self.process_role_assignment(op) for op in batch), return_exceptions=True)
         self.logger.info(self.LOG_PROCESSING_LOOP_ENDED())
 
+    async def process_role_assignment(self, q: dict):
+        """Applies the coalesced role changes for one member; the semaphore caps concurrent edits"""
+        async with self.role_sem:
+            guild_id = q.get("guild_id")
+            user_id = q.get("user_id")
+            if guild_id is not None and user_id is not None:
+                # From here on new reactions start a fresh pending op instead of coalescing into this one
+                self.role_map.pop((guild_id, user_id), None)
+                guild = self.bot.get_guild(guild_id)
+                await self.maybe_update_guild(guild)
+                mem = guild.get_member(user_id)
+                if mem is not None:
+                    # Stay in id space: mem._roles is discord.py's packed id list, so no Role objects
+                    # get materialized, and mem.edit accepts plain snowflakes
+                    # noinspection PyProtectedMember
+                    current_role_ids = set(mem._roles)
+                    all_role_ids = set(current_role_ids)
+                    all_role_ids.update(r.id for r in q[True])
+                    all_role_ids.difference_update(r.id for r in q[False])
+                    all_role_ids.discard(guild.id)  # @everyone shares the guild's id; never try to edit it
+                    if all_role_ids == current_role_ids:
+                        # An add/remove flap coalesced into a no-op; don't spend an edit on it
+                        self.role_queue.task_done()
+                        return
+                    await self.edit_bucket.acquire()  # Steady-state pacing with burst headroom
+                    try:
+                        await mem.edit(roles=[discord.Object(id=role_id) for role_id in all_role_ids])
+                    except (discord.Forbidden, discord.HTTPException):
+                        # Re-register right away so new reactions coalesce into the pending retry,
+                        # but back off before requeueing so a failing endpoint isn't hammered
+                        q["attempts"] = q.get("attempts", 0) + 1
+                        self.role_map[(guild_id, user_id)] = q
+                        asyncio.ensure_future(self.requeue_role_assignment(q))
+                    else:
+                        self.role_queue.task_done()
+                else:
+                    self.logger.warning(self.LOG_MEMBER_NOT_FOUND(user_id=user_id, guild=guild.name))
+
+    async def requeue_role_assignment(self, q: dict):
+        """Requeues a failed member edit after an exponential backoff with jitter
+
+        Runs as its own task so the sleep doesn't hold the processing semaphore"""
+        delay = min(self.RETRY_MAX_DELAY, self.RETRY_BASE_DELAY * 2 ** (q["attempts"] - 1))
+        await asyncio.sleep(delay + random.random() * self.RETRY_BASE_DELAY)
+        await self.role_queue.put(q)
+
     # Utilities
     async def safe_get_message(self, channel: discord.TextChannel, message_id: typing.Union[str, int]) \
             -> typing.Optional[discord.Message]:
+        # Messages with several bound emojis get requested several times at startup;
+        # concurrent callers share the in-flight fetch instead of each paying a round-trip
+        key = (channel.id, int(message_id))
+        future = self.message_fetches.get(key)
+        if future is None:
+            self.message_fetches[key] = future = asyncio.ensure_future(self.fetch_message(channel, message_id))
+            future.add_done_callback(lambda f: self.message_fetches.pop(key, None))
+        return await future
+
+    async def fetch_message(self, channel: discord.TextChannel, message_id: typing.Union[str, int]) \
+            -> typing.Optional[discord.Message]:
         try:
             result = await channel.fetch_message(message_id)
         except (discord.NotFound, discord.Forbidden, discord.HTTPException):
@@ -512,62 +713,89 @@ class ReactRoles(Cog):
 
     # Links
     def get_link(self, server_id: int, channel_id: int, message_id: int) -> set:
-        return self.links.get(server_id, {}).get(str(channel_id) + "_" + str(message_id), set())
+        return self.links.get(server_id, EMPTY_DICT).get((channel_id, message_id), EMPTY_SET)
 
     def parse_links(self, server_id: int, links_list: typing.Iterable[typing.List[str]]):
         """Parses the links of a server into self.links
         links_list is a list of links each link being a list of channel.id_message.id linked together"""
         link_dict = {}
         for link in links_list:
+            # Collect the link's roles first, then map every entry to one immutable set
+            keys = []
             role_list = set()
             for entry in link:
                 channel_id, message_id = entry.split("_", 1)
-                role_list.update(self.get_all_roles_from_message(server_id, int(channel_id), int(message_id)))
-                link_dict[entry] = role_list
-        self.links[server_id] = link_dict
+                key = (int(channel_id), int(message_id))
+                keys.append(key)
+                role_list.update(self.get_all_roles_from_message(server_id, *key))
+            roles = frozenset(role_list)
+            for key in keys:
+                link_dict[key] = roles
+        self.links.setdefault(server_id, {}).update(link_dict)
 
     async def remove_links(self, guild: discord.Guild, name: str):
-        async with self.config.guild(guild).links() as entries:
-            entry_list = entries.get(name, [])
-            link_dict = self.links.get(guild.id, {})
-            for entry in entry_list:
-                if entry in link_dict:
-                    del link_dict[entry]
-            del entries[name]
+        entries = self.link_configs.get(guild.id, {})
+        entry_list = entries.pop(name, [])
+        link_dict = self.links.get(guild.id, {})
+        name_index = self.link_names.get(guild.id, {})
+        for entry in entry_list:
+            names = name_index.get(entry)
+            if names is not None:
+                names.discard(name)
+                if len(names) == 0:
+                    del name_index[entry]
+            channel_id, message_id = entry.split("_", 1)
+            link_dict.pop((int(channel_id), int(message_id)), None)
+        await self.config.guild(guild).links.set(entries)
 
     # Cache -- Needed to keep the actual role object in cache instead of looking for it every time in the server's roles
     def add_to_cache(self, server_id: int, channel_id: int, message_id: int, emoji_str: str, role: discord.Role):
         """Adds an entry to the role cache"""
-        self.role_cache.setdefault(server_id, {}) \
-            .setdefault(channel_id, {}) \
-            .setdefault(message_id, {})[emoji_str] = role
+        self.role_cache[(server_id, channel_id, message_id, emoji_str)] = role
+        if emoji_str.isdigit():
+            # Custom emojis also get an int-keyed alias so raw events can probe with payload.emoji.id directly
+            self.role_cache[(server_id, channel_id, message_id, int(emoji_str))] = role
+        self.message_binds.setdefault((server_id, channel_id, message_id), {})[emoji_str] = role
+        self.bound_messages.setdefault(server_id, set()).add(message_id)
 
     def get_all_roles_from_message(self, server_id: int, channel_id: int, message_id: int) \
             -> typing.Iterable[discord.Role]:
         """Fetches all roles from a given message returns an iterable"""
-        return self.role_cache.get(server_id, {}).get(channel_id, {}).get(message_id, {}).values()
+        return self.message_binds.get((server_id, channel_id, message_id), {}).values()
 
-    def get_from_cache(self, server_id: int, channel_id: int, message_id: int, emoji_str: str) -> discord.Role:
+    def get_from_cache(self, server_id: int, channel_id: int, message_id: int, emoji_key) -> discord.Role:
         """Fetches the role associated with an emoji on the given message"""
-        return self.role_cache.get(server_id, {}).get(channel_id, {}).get(message_id, {}).get(emoji_str)
+        return self.role_cache.get((server_id, channel_id, message_id, emoji_key))
 
     def remove_role_from_cache(self, server_id: int, channel_id: int, message_id: int, emoji_str: str):
         """Removes an entry from the role cache"""
-        server_conf = self.role_cache.get(server_id)
-        if server_conf is not None:
-            channel_conf = server_conf.get(channel_id)
-            if channel_conf is not None:
-                message_conf = channel_conf.get(message_id)
-                if message_conf is not None and emoji_str in message_conf:
-                    del message_conf[emoji_str]
+        self.role_cache.pop((server_id, channel_id, message_id, emoji_str), None)
+        if emoji_str.isdigit():
+            self.role_cache.pop((server_id, channel_id, message_id, int(emoji_str)), None)
+        msg_binds = self.message_binds.get((server_id, channel_id, message_id))
+        if msg_binds is not None:
+            msg_binds.pop(emoji_str, None)
+            if len(msg_binds) == 0:
+                del self.message_binds[(server_id, channel_id, message_id)]
+                self.unbind_message(server_id, message_id)
 
     def remove_message_from_cache(self, server_id: int, channel_id: int, message_id: int):
         """Removes a message from the role cache"""
-        server_conf = self.role_cache.get(server_id)
-        if server_conf is not None:
-            channel_conf = server_conf.get(channel_id)
-            if channel_conf is not None and message_id in channel_conf:
-                del channel_conf[message_id]
+        msg_binds = self.message_binds.pop((server_id, channel_id, message_id), None)
+        if msg_binds is not None:
+            for emoji_str in msg_binds:
+                del self.role_cache[(server_id, channel_id, message_id, emoji_str)]
+                if emoji_str.isdigit():
+                    self.role_cache.pop((server_id, channel_id, message_id, int(emoji_str)), None)
+            self.unbind_message(server_id, message_id)
+
+    def unbind_message(self, server_id: int, message_id: int):
+        """Removes a message from the fast raw-event filter"""
+        guild_messages = self.bound_messages.get(server_id)
+        if guild_messages is not None:
+            guild_messages.discard(message_id)
+            if len(guild_messages) == 0:
+                del self.bound_messages[server_id]
 
     def get_message_config(self, channel_id: int, message_id: int) -> Group:
         return self.config.custom(self.MESSAGE_GROUP, str(channel_id), str(message_id))
@@ -1,9 +1,12 @@
 import logging
 import hashlib
+import heapq
+import itertools
 import re
 import collections
+import time
+import typing
 import discord
-import datetime
 import asyncio
 
 from redbot.core import commands, Config
@@ -28,12 +31,18 @@ class Reminder(Cog):
     __author__ = "ZeLarpMaster#0818"
 
     # Behavior related constants
-    TIME_AMNT_REGEX = re.compile("([1-9][0-9]*)([a-z]+)", re.IGNORECASE)
+    UNIQUE_ID = int(hashlib.sha512((__author__ + "@Reminder").encode()).hexdigest(), 16)
+    TIME_AMNT_REGEX = re.compile("([1-9][0-9]*)([a-z]+)", re.IGNORECASE | re.ASCII)
     TIME_QUANTITIES = collections.OrderedDict([("seconds", 1), ("minutes", 60),
                                                ("hours", 3600), ("days", 86400),
                                                ("weeks", 604800), ("months", 2.628e+6),
                                                ("years", 3.154e+7)])  # (amount in seconds, max amount)
     MAX_SECONDS = TIME_QUANTITIES["years"] * 2
+    # Every abbreviation prefix mapped to its multiplier; built in reverse so the earliest
+    # quantity claims shared prefixes, which keeps "m" on minutes instead of months
+    TIME_PREFIX_MAP = {name[:i]: amount
+                       for name, amount in reversed(TIME_QUANTITIES.items())
+                       for i in range(1, len(name) + 1)}
 
     # Embed constants
     REMINDER_TITLE = _("Reminder")
@@ -49,43 +58,43 @@ class Reminder(Cog):
         self.bot = bot
         self.logger = logging.getLogger("red.ZeCogsV3.reminder")
         # force_registration is for weaklings
-        unique_id = int(hashlib.sha512((self.__author__ + "@" + self.__class__.__name__).encode()).hexdigest(), 16)
-        self.config = Config.get_conf(self, identifier=unique_id)
+        self.config = Config.get_conf(self, identifier=self.UNIQUE_ID)
         self.config.register_user(reminders=[])
-        self.futures = {}
+        # One scheduler task owns every reminder instead of one parked task per reminder
+        self.reminder_heap = []  # (end_time, sequence number, user id, reminder dict)
+        self.reminder_seq = itertools.count()  # Tie-breaker so equal deadlines never compare dicts
+        self.heap_wake = asyncio.Event()
+        self.scheduler = asyncio.ensure_future(self.process_reminders())
         asyncio.ensure_future(self.start_saved_reminders())
 
     # Events
     def cog_unload(self):
-        for user_futures in self.futures.values():
-            for future in user_futures:
-                future.cancel()
+        self.scheduler.cancel()
 
     # Commands
     @commands.group(invoke_without_command=True)
-    async def remind(self, ctx: Context, time: str, *, text: str):
+    async def remind(self, ctx: Context, duration: str, *, text: str):
         """Remind yourself of something in a specific amount of time
 
-        Examples for time: `5d`, `10m`, `10m30s`, `1h`, `1y1mo2w5d10h30m15s`
+        Examples for duration: `5d`, `10m`, `10m30s`, `1h`, `1y1mo2w5d10h30m15s`
         Abbreviations: s for seconds, m for minutes, h for hours, d for days, w for weeks, mo for months, y for years
         Any longer abbreviation is accepted. `m` assumes minutes instead of months.
         One month is counted as exact 365/12 days.
         Ignores all invalid abbreviations."""
         message = ctx.message
-        seconds = self.get_seconds(time)
+        seconds = self.get_seconds(duration)
         if seconds is None:
             response = self.INVALID_TIME_FORMAT()
         elif seconds >= self.MAX_SECONDS:
             response = self.TOO_MUCH_TIME(round(self.MAX_SECONDS))
         else:
             user = message.author
-            time_now = datetime.datetime.utcnow()
-            days, secs = divmod(seconds, 3600*24)
-            end_time = time_now + datetime.timedelta(days=days, seconds=secs)
-            reminder = {"content": text, "start_time": time_now.timestamp(), "end_time": end_time.timestamp()}
+            now_ts = time.time()
+            reminder = {"content": text, "start_time": now_ts, "end_time": now_ts + seconds}
             async with self.config.user(user).reminders() as user_reminders:
                 user_reminders.append(reminder)
-            self.futures.setdefault(user.id, []).append(asyncio.ensure_future(self.remind_later(user, seconds, text, reminder)))
+            heapq.heappush(self.reminder_heap, (reminder["end_time"], next(self.reminder_seq), user.id, reminder))
+            self.heap_wake.set()  # Rearm the scheduler in case this deadline is now the earliest
             response = self.WILL_REMIND(seconds)
         await ctx.send(response)
 
@@ -100,8 +109,9 @@ class Reminder(Cog):
     async def forget_all(self, ctx: Context):
         """Forget **all** your reminders"""
         user = ctx.message.author
-        for future in self.futures.get(user.id, []):
-            future.cancel()
+        self.reminder_heap = [entry for entry in self.reminder_heap if entry[2] != user.id]
+        heapq.heapify(self.reminder_heap)
+        self.heap_wake.set()
         async with self.config.user(user).reminders() as user_reminders:
             user_reminders.clear()
         await ctx.send(self.FORGOT_ALL())
@@ -110,32 +120,51 @@ class Reminder(Cog):
     async def start_saved_reminders(self):
         await self.bot.wait_until_ready()
         user_configs = await self.config.all_users()
-        for user_id, user_config in list(user_configs.items()):  # Making a copy
+        for user_id, user_config in user_configs.items():  # all_users() already returns a snapshot
             for reminder in user_config["reminders"]:
-                user = self.bot.get_user(user_id)
-                if user is None:
-                    await self.config.remove(reminder)  # Delete the reminder if the user doesn't have a mutual server anymore
-                else:
-                    time_diff = datetime.datetime.fromtimestamp(reminder["end_time"]) - datetime.datetime.utcnow()
-                    time = max(0.0, time_diff.total_seconds())
-                    fut = asyncio.ensure_future(self.remind_later(user, time, reminder["content"], reminder))
-                    self.futures.setdefault(user.id, []).append(fut)
-
-    async def remind_later(self, user: discord.User, time: float, content: str, reminder):
-        # Reminds the `user` in `time` seconds with a message containing `content`
-        await asyncio.sleep(time)
-        embed = discord.Embed(title=self.REMINDER_TITLE(), description=content, color=discord.Colour.blue())
-        await user.send(embed=embed)
-        async with self.config.user(user).reminders() as user_reminders:
-            user_reminders.remove(reminder)
+                # Whether the user is still reachable is decided when the reminder fires
+                heapq.heappush(self.reminder_heap, (reminder["end_time"], next(self.reminder_seq),
+                                                    user_id, reminder))
+        self.heap_wake.set()
 
-    def get_seconds(self, time):
+    async def process_reminders(self):
+        """Sleeps until the earliest deadline, fires whatever expired, repeats"""
+        await self.bot.wait_until_ready()
+        while self == self.bot.get_cog(self.__class__.__name__):
+            self.heap_wake.clear()
+            if len(self.reminder_heap) > 0:
+                timeout = max(0.0, self.reminder_heap[0][0] - time.time())
+            else:
+                timeout = None  # Nothing scheduled; sleep until a reminder is added
+            try:
+                await asyncio.wait_for(self.heap_wake.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass  # The head deadline came due; a wake just means the head may have changed
+            now = time.time()
+            expired = {}  # {user id: [reminders]} so a burst costs one config write per user
+            while len(self.reminder_heap) > 0 and self.reminder_heap[0][0] <= now:
+                _, _, user_id, reminder = heapq.heappop(self.reminder_heap)
+                expired.setdefault(user_id, []).append(reminder)
+            for user_id, reminders in expired.items():
+                await self.send_reminders(user_id, reminders)
+
+    async def send_reminders(self, user_id: int, reminders: typing.List[dict]):
+        user = self.bot.get_user(user_id)
+        if user is not None:
+            for reminder in reminders:
+                embed = discord.Embed(title=self.REMINDER_TITLE(), description=reminder["content"],
+                                      color=discord.Colour.blue())
+                try:
+                    await user.send(embed=embed)
+                except discord.HTTPException:
+                    self.logger.exception("Failed to send a reminder to user {}.".format(user_id))
+        async with self.config.user_from_id(user_id).reminders() as user_reminders:
+            for reminder in reminders:
+                if reminder in user_reminders:
+                    user_reminders.remove(reminder)
+
+    def get_seconds(self, time_str):
         # Returns the amount of converted time or None if invalid
-        seconds = 0
-        for time_match in self.TIME_AMNT_REGEX.finditer(time):
-            time_amnt = int(time_match.group(1))
-            time_abbrev = time_match.group(2)
-            time_quantity = discord.utils.find(lambda t: t[0].startswith(time_abbrev), self.TIME_QUANTITIES.items())
-            if time_quantity is not None:
-                seconds += time_amnt * time_quantity[1]
-        return None if seconds == 0 else seconds
+        seconds = sum(int(m.group(1)) * self.TIME_PREFIX_MAP.get(m.group(2).lower(), 0)
+                      for m in self.TIME_AMNT_REGEX.finditer(time_str))
+        return seconds or None
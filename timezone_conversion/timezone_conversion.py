@@ -1,3 +1,5 @@
+import asyncio
+import itertools
 import logging
 import math
 import datetime
@@ -19,9 +21,8 @@ T_ = Translator("TimezoneConversion", __file__)  # pygettext3 -Dnp locales timez
 
 def _(s):
     def func(*args, **kwargs):
-        real_args = list(args)
-        real_args.pop(0)
-        return T_(s).format(*real_args, **kwargs)
+        # args[0] is the cog instance since these are accessed as attributes; slice it off
+        return T_(s).format(*args[1:], **kwargs)
     return func
 
 
@@ -31,7 +32,15 @@ class TimezoneConversion(Cog):
     __author__ = "ZeLarpMaster#0818"
 
     # Behavior constants
-    TIME_REGEX = re.compile("(now|((1?[0-9])([ap]m))|(([0-9]{1,2}):([0-9]{2})))")
+    UNIQUE_ID = int(hashlib.sha512((__author__ + "@TimezoneConversion").encode()).hexdigest(), 16)
+    TIME_REGEX = re.compile("(now|((1?[0-9])([ap]m))|(([0-9]{1,2}):([0-9]{2})))", re.ASCII)
+    # The last path segment of every tz name, lowered, mapped back to the full name
+    TZ_BY_SUFFIX = {name.rsplit("/", 1)[-1].lower(): name for name in pytz.all_timezones}
+    # And the other direction: full tz name to its display suffix, so no splitting at call time
+    TZ_SUFFIX_OF = {name: name.rsplit("/", 1)[-1] for name in pytz.all_timezones}
+    # 12-hour clock face and meridiem for each of the 24 hours
+    HOUR_12 = tuple(str((h - 1) % 12 + 1) for h in range(24))
+    HOUR_AMPM = ("AM",) * 12 + ("PM",) * 12
 
     # Embed constants
     ALIAS_LIST_TITLE = _("Alias List")
@@ -62,9 +71,10 @@ If timezone2 is omitted, it will only respond to *now* requests.""")
         self.bot = bot
         self.logger = logging.getLogger("red.ZeCogsV3.message_proxy")
 
-        unique_id = int(hashlib.sha512((self.__author__ + "@" + self.__class__.__name__).encode()).hexdigest(), 16)
-        self.config = Config.get_conf(self, identifier=unique_id)
+        self.config = Config.get_conf(self, identifier=self.UNIQUE_ID)
         self.config.register_global(aliases={})
+        self.aliases = {}  # Write-through copy of the aliases config; edits are rare, reads per-command
+        asyncio.ensure_future(self.load_aliases())
 
     @commands.group(name="time", invoke_without_command=True)
     async def _time_converter(self, ctx: Context, time, timezone1, timezone2=None):
@@ -76,7 +86,6 @@ If timezone2 is omitted, it will only respond to *now* requests.""")
         if time is None and timezone1 is None:
             await ctx.send_help()
         else:
-            self.aliases = await self.config.aliases()
             if None in (time, timezone1) or "" in (time, timezone1, timezone2):
                 msg = self.TIME_USAGE(prefix=ctx.prefix)
             elif timezone2 is None and time == "now":
@@ -113,14 +122,14 @@ If timezone2 is omitted, it will only respond to *now* requests.""")
         if " " not in alias_name and " " not in timezone:
             alias_name = alias_name.lower()
             timezone = timezone.lower()
-            aliases = await self.config.aliases()
-            if alias_name not in aliases:
+            if alias_name not in self.aliases:
                 alias_zone = self.find_timezone(alias_name)
                 if alias_zone is None:
                     zone = self.find_timezone(timezone)
                     if zone is not None:
                         async with self.config.aliases() as aliases:
                             aliases[alias_name] = zone
+                        self.aliases[alias_name] = zone
                         message = self.ALIAS_ADDED(alias=alias_name, zone=zone)
                     else:
                         message = self.INEXISTANT_TZ() + self.LIST_OF_TZ()
@@ -137,35 +146,35 @@ If timezone2 is omitted, it will only respond to *now* requests.""")
     async def _remove_alias(self, ctx: Context, alias_name):
         """Delete a timezone alias"""
         alias_name = alias_name.lower()
-        async with self.config.aliases() as aliases:
-            if alias_name in aliases:
-                del aliases[alias_name]
-                response = self.ALIAS_REMOVED(alias=alias_name)
-            else:
-                response = self.ALIAS_CANT_REMOVE(alias=alias_name)
+        if alias_name in self.aliases:
+            async with self.config.aliases() as aliases:
+                aliases.pop(alias_name, None)
+            del self.aliases[alias_name]
+            response = self.ALIAS_REMOVED(alias=alias_name)
+        else:
+            response = self.ALIAS_CANT_REMOVE(alias=alias_name)
         await ctx.send(response)
     
     @alias.command(name="list", aliases=["ls"])
     async def _list_alias(self, ctx: Context):
         """List all timezone aliases"""
-        aliases = await self.config.aliases()
-        alias_list = list(aliases.items())
-        embed = discord.Embed(title=self.ALIAS_LIST_TITLE(), colour=discord.Colour.light_grey(), description="```")
+        alias_list = list(self.aliases.items())
+        embed = discord.Embed(title=self.ALIAS_LIST_TITLE(), colour=discord.Colour.light_grey())
         if len(alias_list) > 0:
             half = math.ceil(len(alias_list) / 2)
-            for i, a in enumerate(alias_list[:half]):
-                a1_name = "{} → {}".format(*a)
-                if i+half < len(alias_list):
-                    a2_name = "{} → {}".format(*alias_list[i+half])
-                else:
-                    a2_name = ""
-                embed.description += "{:<30}  {:<30}\n".format(a1_name, a2_name)
-            embed.description += "```"
+            # Two columns, folded at the halfway point; one join instead of growing the string
+            lines = ("{:<30}  {:<30}\n".format("{} → {}".format(*left),
+                                               "{} → {}".format(*right) if right is not None else "")
+                     for left, right in itertools.zip_longest(alias_list[:half], alias_list[half:]))
+            embed.description = "```" + "".join(lines) + "```"
         else:
             embed.description = self.ALIAS_LIST_EMPTY()
         await ctx.send(embed=embed)
 
     # Utilities
+    async def load_aliases(self):
+        self.aliases = await self.config.aliases()
+
     def format_hours_minutes(self, hours: int, minutes: int) -> str:
         format_24 = hours
         format_minutes = ":{:0>2}".format(minutes)
@@ -174,38 +183,24 @@ If timezone2 is omitted, it will only respond to *now* requests.""")
         return f"**{format_12}** ({format_24}{format_minutes})"
 
     def find_timezone(self, part: str) -> typing.Optional[str]:
-        return discord.utils.find(lambda z: z.rsplit("/")[-1].lower() == part, pytz.all_timezones_set)
+        return self.TZ_BY_SUFFIX.get(part)
 
     def match_timezones(self, country: str) -> typing.List[datetime.tzinfo]:
         return [pytz.timezone(item) for item in pytz.all_timezones if item.lower().endswith(country)]
 
     def match_timezone(self, country: str) -> typing.Tuple[str, datetime.tzinfo]:
         country = country.lower()
-        if country in self.aliases:
-            zone = self.aliases[country]
-            result = zone.rsplit("/")[-1], pytz.timezone(zone)
+        zone = self.aliases.get(country)
+        if zone is None:
+            zone = self.find_timezone(country)
+        if zone is not None:
+            # Aliases might point at a name from an older tz database; split those on the fly
+            suffix = self.TZ_SUFFIX_OF.get(zone) or zone.rsplit("/", 1)[-1]
+            result = suffix, pytz.timezone(zone)
         else:
-            timezone_name = self.find_timezone(country)
-            if timezone_name is not None:
-                name = timezone_name.rsplit("/")[-1]
-                result = name, pytz.timezone(timezone_name)
-            else:
-                result = None, None
+            result = None, None
         return result
 
-    def get_zone_offset(self, zone: datetime.tzinfo) -> datetime.timedelta:
-        return datetime.datetime.now(tz=zone).utcoffset()
-
-    def timezone_diff(self, zone_src: datetime.tzinfo, zone_dst: datetime.tzinfo) -> typing.Tuple[float, float]:
-        total_offset = self.get_zone_offset(zone_dst) - self.get_zone_offset(zone_src)
-        offset_seconds = total_offset.total_seconds()
-        offset_minutes = offset_seconds // 60
-        return divmod(offset_minutes, 60)
-
-    def get_zone_time(self, zone: datetime.tzinfo) -> typing.Tuple[int, int]:
-        dt = datetime.datetime.now(tz=zone)
-        return dt.hour, dt.minute
-
     def format_timezone(self, hours_source: int, minutes_source: int, country_source: str, country_dest: str) -> str:
         csource, zone1 = self.match_timezone(country_source)
         cdest, zone2 = self.match_timezone(country_dest)
@@ -214,12 +209,17 @@ If timezone2 is omitted, it will only respond to *now* requests.""")
         elif zone2 is None:  # Destination timezone not found
             result = self.INVALID_DESTINATION_TZ() + self.LIST_OF_TZ()
         else:
+            # One clock read serves both zones; everything else derives from the localized copies
+            now = datetime.datetime.now(datetime.timezone.utc)
+            local_src = now.astimezone(zone1)
+            local_dst = now.astimezone(zone2)
             if hours_source is None and minutes_source is None:
-                time_source = self.get_zone_time(zone1)
-                hours_dest, minutes_dest = self.get_zone_time(zone2)
-                time_diff = (hours_dest - time_source[0], minutes_dest - time_source[1])
+                hours_source, minutes_source = local_src.hour, local_src.minute
+                hours_dest, minutes_dest = local_dst.hour, local_dst.minute
+                time_diff = (hours_dest - hours_source, minutes_dest - minutes_source)
             else:
-                time_diff = self.timezone_diff(zone1, zone2)
+                offset_minutes = (local_dst.utcoffset() - local_src.utcoffset()).total_seconds() // 60
+                time_diff = divmod(offset_minutes, 60)
                 hours_dest = (hours_source + time_diff[0] + 24) % 24
                 minutes_dest = (minutes_source + time_diff[1] + 60) % 60
                 time_diff = (int(time_diff[0]), int(time_diff[1]))
@@ -229,6 +229,8 @@ If timezone2 is omitted, it will only respond to *now* requests.""")
         return result
 
     def _handle_time(self, time: str, country_source: str, country_result: str) -> str:
+        if time == "now":  # The common case; no need for the regex to confirm it
+            return self.format_timezone(None, None, country_source, country_result)
         regex = self.TIME_REGEX.fullmatch(time)
         msg = ""
         error = False
@@ -239,9 +241,6 @@ If timezone2 is omitted, it will only respond to *now* requests.""")
         elif regex and regex.group(5) is not None:  # 00:00
             hours_source = int(regex.group(6))
             minutes_source = int(regex.group(7))
-        elif regex and regex.group(1) == "now":
-            hours_source = None
-            minutes_source = None
         else:  # Invalid format
             hours_source = 0
             minutes_source = 0
@@ -255,21 +254,8 @@ If timezone2 is omitted, it will only respond to *now* requests.""")
         return msg
 
     def _convert_12h_to_24h(self, hours: int, is_pm: bool) -> int:
-        if hours == 12:
-            if is_pm:
-                result = 12
-            else:
-                result = 0
-        else:
-            result = hours + (12 if is_pm else 0)
-        return result
+        # The modulo folds 12am to 0 and leaves everything else alone
+        return (hours % 12) + (12 if is_pm else 0)
 
     def _get_12h_str(self, hours: int, mins_str: str) -> str:
-        pm_str = "AM" if hours < 12 else "PM"
-        if hours == 0:
-            hours_12 = "12"
-        elif hours > 12:
-            hours_12 = str(hours - 12)
-        else:
-            hours_12 = str(hours)
-        return f"{hours_12}{mins_str} {pm_str}"
+        return f"{self.HOUR_12[hours]}{mins_str} {self.HOUR_AMPM[hours]}"